@@ -0,0 +1,215 @@
+import os
+import re
+import sys
+import json
+import math
+import glob
+import random
+import zlib
+from ticket_type_names import ticket_types
+
+FALLBACK_TICKET_TYPE = "Other"
+DEFAULT_MODEL_PATH = "ticket_type_model.json"
+DEFAULT_HASH_BUCKETS = 2 ** 18
+
+TOKEN_PATTERN = re.compile(r"\w+")
+
+
+def extract_features(text, buckets=DEFAULT_HASH_BUCKETS):
+    """Hash word unigrams, word bigrams and character trigrams into feature indexes"""
+    words = TOKEN_PATTERN.findall(text.lower())
+    grams = ["w:" + word for word in words]
+    grams += ["b:" + first + " " + second for first, second in zip(words, words[1:])]
+    for word in words:
+        padded = f"<{word}>"
+        grams += ["c:" + padded[i:i + 3] for i in range(len(padded) - 2)]
+
+    # crc32 is stable across processes, unlike hash()
+    return {zlib.crc32(gram.encode("utf-8")) % buckets for gram in grams}
+
+
+def ticket_text(title, description=None):
+    """Combine a ticket's title and description into the text the model sees"""
+    return f"{title or ''} {description or ''}"
+
+
+class TicketTypeClassifier:
+    """Hashed n-gram multinomial logistic regression over the ticket types in ticket_type_names
+
+    predict() returns (ticket type name, confidence) and falls back to "Other"
+    when the most likely type scores below min_confidence.
+    """
+
+    def __init__(self, labels=None, buckets=DEFAULT_HASH_BUCKETS, min_confidence=0.5):
+        self.labels = list(labels or ticket_types)
+        self.buckets = buckets
+        self.min_confidence = min_confidence
+        self.weights = {}  # feature index -> per-label weights
+        self.bias = [0.0] * len(self.labels)
+
+    def _probabilities(self, features):
+        scores = list(self.bias)
+        for feature in features:
+            feature_weights = self.weights.get(feature)
+            if feature_weights is not None:
+                for i, weight in enumerate(feature_weights):
+                    scores[i] += weight
+
+        top = max(scores)
+        exps = [math.exp(score - top) for score in scores]
+        total = sum(exps)
+        return [value / total for value in exps]
+
+    def train(self, examples, epochs=10, learning_rate=0.2, seed=0):
+        """Fit on (text, ticket type name) pairs with SGD; unknown labels are skipped"""
+        label_index = {label: i for i, label in enumerate(self.labels)}
+        data = [
+            (extract_features(text, self.buckets), label_index[label])
+            for text, label in examples if label in label_index
+        ]
+        rng = random.Random(seed)
+
+        for epoch in range(epochs):
+            rng.shuffle(data)
+            rate = learning_rate / (1 + epoch)
+
+            for features, target in data:
+                probabilities = self._probabilities(features)
+                gradient = [p - (1.0 if i == target else 0.0) for i, p in enumerate(probabilities)]
+
+                for i, g in enumerate(gradient):
+                    self.bias[i] -= rate * g
+                for feature in features:
+                    feature_weights = self.weights.get(feature)
+                    if feature_weights is None:
+                        feature_weights = self.weights[feature] = [0.0] * len(self.labels)
+                    for i, g in enumerate(gradient):
+                        feature_weights[i] -= rate * g
+
+        return len(data)
+
+    def predict(self, title, description=None):
+        """Predict the ticket type for a title/description; returns (name, confidence)"""
+        return self.predict_text(ticket_text(title, description))
+
+    def predict_text(self, text):
+        probabilities = self._probabilities(extract_features(text, self.buckets))
+        best = max(range(len(self.labels)), key=probabilities.__getitem__)
+        confidence = probabilities[best]
+
+        if confidence < self.min_confidence and FALLBACK_TICKET_TYPE in self.labels:
+            return FALLBACK_TICKET_TYPE, confidence
+        return self.labels[best], confidence
+
+    def predict_batch(self, texts):
+        """Classify many texts at once; returns a list of (name, confidence)"""
+        return [self.predict_text(text) for text in texts]
+
+    def save(self, path=DEFAULT_MODEL_PATH):
+        model = {
+            "labels": self.labels,
+            "buckets": self.buckets,
+            "min_confidence": self.min_confidence,
+            "bias": self.bias,
+            # Round weights to keep the model file small
+            "weights": {str(feature): [round(w, 5) for w in values] for feature, values in self.weights.items()}
+        }
+        with open(path, 'w') as f:
+            json.dump(model, f)
+
+    @classmethod
+    def load(cls, path=DEFAULT_MODEL_PATH):
+        with open(path, 'r') as f:
+            model = json.load(f)
+
+        classifier = cls(model["labels"], model["buckets"], model["min_confidence"])
+        classifier.bias = model["bias"]
+        classifier.weights = {int(feature): values for feature, values in model["weights"].items()}
+        return classifier
+
+
+def load_training_examples(export_dir="export"):
+    """Read (text, ticket type name) pairs from the JSONL chunks written by export.py"""
+    examples = []
+    for path in sorted(glob.glob(os.path.join(export_dir, "part-*.jsonl"))):
+        with open(path, 'r', encoding="utf-8") as f:
+            for line in f:
+                record = json.loads(line)
+                if record.get("ticket_type_name") and (record.get("title") or record.get("description")):
+                    examples.append((ticket_text(record.get("title"), record.get("description")),
+                                     record["ticket_type_name"]))
+    return examples
+
+
+def load_classifier(path=DEFAULT_MODEL_PATH):
+    """Load the trained model if one has been saved; None otherwise"""
+    try:
+        return TicketTypeClassifier.load(path)
+    except FileNotFoundError:
+        return None
+
+
+def route_ticket_type(classifier, title, description, ticket_type_ids):
+    """Pick the ticket_type_id for a new ticket using ticket_type_ids.json-style mapping
+
+    Without a classifier (no trained model yet) every ticket goes to "Other",
+    as does a prediction with no ID in ticket_type_ids. Returns
+    (ticket_type_id, ticket type name, confidence), where confidence is None
+    unless the ticket went to the predicted type.
+    """
+    if classifier is None:
+        name, confidence = FALLBACK_TICKET_TYPE, None
+    else:
+        name, confidence = classifier.predict(title, description)
+    if name not in ticket_type_ids:
+        # The prediction's confidence says nothing about "Other"
+        name, confidence = FALLBACK_TICKET_TYPE, None
+    return ticket_type_ids.get(name), name, confidence
+
+
+def main():
+    if len(sys.argv) < 2 or sys.argv[1] not in ["train", "predict"]:
+        print("Usage:")
+        print("  python classifier.py train [export_dir] [model_path]")
+        print("  python classifier.py predict \"title\" [\"description\"] [model_path]")
+        return
+
+    if sys.argv[1] == "train":
+        export_dir = sys.argv[2] if len(sys.argv) > 2 else "export"
+        model_path = sys.argv[3] if len(sys.argv) > 3 else DEFAULT_MODEL_PATH
+
+        print(f"📚 Loading training tickets from '{export_dir}'...")
+        examples = load_training_examples(export_dir)
+        if not examples:
+            print("❌ No labelled tickets found. Run export.py first.")
+            return
+
+        random.Random(0).shuffle(examples)
+        holdout = examples[:len(examples) // 10]
+        training = examples[len(examples) // 10:]
+
+        classifier = TicketTypeClassifier()
+        trained = classifier.train(training)
+        print(f"✅ Trained on {trained} tickets")
+
+        if holdout:
+            correct = sum(
+                1 for (name, _), (_, label) in zip(classifier.predict_batch([text for text, _ in holdout]), holdout)
+                if name == label
+            )
+            print(f"   Holdout accuracy: {correct / len(holdout):.1%} ({len(holdout)} tickets)")
+
+        classifier.save(model_path)
+        print(f"💾 Model saved to '{model_path}'")
+    else:
+        title = sys.argv[2] if len(sys.argv) > 2 else ""
+        description = sys.argv[3] if len(sys.argv) > 3 else ""
+        model_path = sys.argv[4] if len(sys.argv) > 4 else DEFAULT_MODEL_PATH
+
+        classifier = TicketTypeClassifier.load(model_path)
+        name, confidence = classifier.predict(title, description)
+        print(f"🎫 {name} ({confidence:.0%} confidence)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+import requests
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Get access token from environment
+intercom_access_token = os.getenv("INTERCOM_ACCESS_TOKEN")
+
+if not intercom_access_token:
+    raise ValueError("INTERCOM_ACCESS_TOKEN not found in environment variables")
+
+
+def update_ticket_attributes(ticket_id, ticket_attributes):
+    """Update attributes (e.g. Priority, Urgency Score, Due Date) on a ticket"""
+    url = f"https://api.intercom.io/tickets/{ticket_id}"
+    headers = {
+        "Intercom-Version": "2.9",
+        "accept": "application/json",
+        "authorization": f"Bearer {intercom_access_token}",
+        "content-type": "application/json"
+    }
+
+    response = requests.put(url, headers=headers, json={"ticket_attributes": ticket_attributes}, timeout=30)
+    return response
+
+
+class TicketUpdateCoalescer:
+    """Merges attribute updates to the same ticket and sends one update per window
+
+    Each call to update() returns a Future. When the ticket is flushed, every
+    caller that contributed to the merged update gets the same result:
+    {"ticket_id", "ticket_attributes" (final merged state), "merged_updates",
+    "status_code", "response"}. Later values for the same attribute win.
+
+    Sends run on a thread pool with at most one update in flight per ticket;
+    changes that arrive meanwhile wait in pending, so updates to a ticket are
+    applied in order and never block update() callers.
+    """
+
+    def __init__(self, window_seconds=2.0, max_batch_size=20, send=update_ticket_attributes, max_workers=8):
+        self.window_seconds = window_seconds
+        self.max_batch_size = max_batch_size
+        self.send = send
+        self.pending = {}  # ticket_id -> {"attributes", "futures", "first_at"}
+        self.in_flight = set()  # ticket_ids with a send running
+        self.lock = threading.Condition()
+        self.closed = False
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="ticket-update")
+        self.flusher = threading.Thread(target=self._flush_loop, name="ticket-update-coalescer", daemon=True)
+        self.flusher.start()
+
+    def update(self, ticket_id, ticket_attributes):
+        """Queue attribute changes for a ticket; returns a Future with the merged result"""
+        future = Future()
+
+        with self.lock:
+            if self.closed:
+                raise RuntimeError("TicketUpdateCoalescer is closed")
+
+            entry = self.pending.get(ticket_id)
+            if entry is None:
+                entry = self.pending[ticket_id] = {"attributes": {}, "futures": [], "first_at": time.monotonic()}
+                self.lock.notify_all()
+
+            entry["attributes"].update(ticket_attributes)
+            entry["futures"].append(future)
+
+            if len(entry["futures"]) >= self.max_batch_size:
+                self._dispatch(ticket_id)
+
+        return future
+
+    def flush(self):
+        """Send every pending update now and wait until they have all completed"""
+        with self.lock:
+            while self.pending or self.in_flight:
+                for ticket_id in list(self.pending):
+                    self._dispatch(ticket_id)
+                self.lock.wait()
+
+    def close(self):
+        """Flush what is left and stop the background flusher"""
+        with self.lock:
+            self.closed = True
+            self.lock.notify_all()
+        self.flusher.join()
+        self.flush()
+        self.executor.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _is_due(self, entry, now):
+        return len(entry["futures"]) >= self.max_batch_size or entry["first_at"] + self.window_seconds <= now
+
+    def _dispatch(self, ticket_id):
+        """Start sending a ticket's pending update (caller holds the lock)"""
+        if ticket_id in self.in_flight:
+            return  # picked up again when the running send finishes
+        entry = self.pending.pop(ticket_id)
+        self.in_flight.add(ticket_id)
+        self.executor.submit(self._send, ticket_id, entry)
+
+    def _flush_loop(self):
+        with self.lock:
+            while not self.closed:
+                now = time.monotonic()
+                next_deadline = None
+                for ticket_id, entry in list(self.pending.items()):
+                    if ticket_id in self.in_flight:
+                        continue
+                    if self._is_due(entry, now):
+                        self._dispatch(ticket_id)
+                    else:
+                        deadline = entry["first_at"] + self.window_seconds
+                        if next_deadline is None or deadline < next_deadline:
+                            next_deadline = deadline
+
+                self.lock.wait(None if next_deadline is None else next_deadline - now)
+
+    def _send(self, ticket_id, entry):
+        try:
+            self._deliver(ticket_id, entry)
+        finally:
+            with self.lock:
+                self.in_flight.discard(ticket_id)
+                waiting = self.pending.get(ticket_id)
+                if waiting is not None and self._is_due(waiting, time.monotonic()):
+                    self._dispatch(ticket_id)
+                self.lock.notify_all()
+
+    def _deliver(self, ticket_id, entry):
+        try:
+            response = self.send(ticket_id, entry["attributes"])
+            result = {
+                "ticket_id": ticket_id,
+                "ticket_attributes": entry["attributes"],
+                "merged_updates": len(entry["futures"]),
+                "status_code": response.status_code,
+                "response": response
+            }
+        except Exception as e:
+            for future in entry["futures"]:
+                future.set_exception(e)
+            return
+
+        if response.status_code != 200:
+            print(f"❌ Failed to update ticket {ticket_id}: {response.status_code}")
+            print(f"   Error: {response.text}")
+
+        for future in entry["futures"]:
+            future.set_result(result)
@@ -0,0 +1,423 @@
+import requests
+import os
+import json
+import time
+import argparse
+import threading
+from datetime import datetime, timezone
+from concurrent.futures import ThreadPoolExecutor
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Get access token from environment
+intercom_access_token = os.getenv("INTERCOM_ACCESS_TOKEN")
+
+if not intercom_access_token:
+    raise ValueError("INTERCOM_ACCESS_TOKEN not found in environment variables")
+
+headers = {
+    "Intercom-Version": "2.9",
+    "accept": "application/json",
+    "authorization": f"Bearer {intercom_access_token}",
+    "content-type": "application/json"
+}
+
+MANIFEST_NAME = "manifest.json"
+SEARCH_PAGE_SIZE = 150  # Intercom's maximum per_page for ticket search
+MAX_RETRIES = 5
+
+_local = threading.local()
+
+
+def get_session():
+    """One keep-alive session per thread so parallel fetches reuse connections"""
+    session = getattr(_local, "session", None)
+    if session is None:
+        session = _local.session = requests.Session()
+        session.headers.update(headers)
+    return session
+
+
+def request_with_retry(method, url, missing_ok=False, **kwargs):
+    """Send a request, backing off on 429 and 5xx responses
+
+    With missing_ok, a 404 returns None instead of raising (e.g. a ticket
+    deleted between the search and the fetch).
+    """
+    for attempt in range(MAX_RETRIES):
+        try:
+            response = get_session().request(method, url, timeout=30, **kwargs)
+        except requests.RequestException as e:
+            if attempt == MAX_RETRIES - 1:
+                raise
+            print(f"⚠️  {method} {url} failed ({str(e)}), retrying...")
+            time.sleep(2 ** attempt)
+            continue
+
+        if response.status_code == 429 or response.status_code >= 500:
+            if attempt == MAX_RETRIES - 1:
+                break
+            try:
+                time.sleep(float(response.headers.get("Retry-After", 2 ** attempt)))
+            except ValueError:
+                time.sleep(2 ** attempt)
+            continue
+
+        break
+
+    if response.status_code == 404 and missing_ok:
+        return None
+    if response.status_code != 200:
+        raise RuntimeError(f"{method} {url} failed: {response.status_code} - {response.text}")
+    return response.json()
+
+
+def build_search_query(created_after=None, created_before=None, ticket_type_ids=None):
+    """Build a ticket search query for a time range and/or ticket types"""
+    conditions = [{"field": "created_at", "operator": ">", "value": str(created_after or 0)}]
+
+    if created_before:
+        conditions.append({"field": "created_at", "operator": "<", "value": str(created_before)})
+
+    if ticket_type_ids:
+        type_conditions = [
+            {"field": "ticket_type_id", "operator": "=", "value": str(type_id)}
+            for type_id in ticket_type_ids
+        ]
+        conditions.append(type_conditions[0] if len(type_conditions) == 1 else {"operator": "OR", "value": type_conditions})
+
+    return conditions[0] if len(conditions) == 1 else {"operator": "AND", "value": conditions}
+
+
+def search_tickets(query, starting_after=None):
+    """Fetch one page of ticket search results; returns (tickets, next cursor)"""
+    pagination = {"per_page": SEARCH_PAGE_SIZE}
+    if starting_after:
+        pagination["starting_after"] = starting_after
+
+    data = request_with_retry(
+        "POST", "https://api.intercom.io/tickets/search",
+        json={"query": query, "pagination": pagination}
+    )
+    next_page = (data.get("pages") or {}).get("next") or {}
+    return data.get("tickets", []), next_page.get("starting_after")
+
+
+def get_ticket(ticket_id):
+    """Fetch a single ticket with its conversation parts; None if it no longer exists"""
+    return request_with_retry("GET", f"https://api.intercom.io/tickets/{ticket_id}", missing_ok=True)
+
+
+def to_record(ticket):
+    """Flatten a ticket into the row written to the export"""
+    ticket_type = ticket.get("ticket_type") or {}
+    attributes = ticket.get("ticket_attributes") or {}
+    parts = (ticket.get("ticket_parts") or {}).get("ticket_parts") \
+        or (ticket.get("conversation_parts") or {}).get("conversation_parts") or []
+    contacts = (ticket.get("contacts") or {}).get("contacts", [])
+
+    return {
+        "id": ticket.get("id"),
+        "ticket_type_id": ticket_type.get("id"),
+        "ticket_type_name": ticket_type.get("name"),
+        "state": ticket.get("ticket_state"),
+        "created_at": ticket.get("created_at"),
+        "updated_at": ticket.get("updated_at"),
+        "title": attributes.get("_default_title_"),
+        "description": attributes.get("_default_description_"),
+        "ticket_attributes": attributes,
+        "contacts": [contact.get("id") for contact in contacts],
+        "parts": [
+            {
+                "id": part.get("id"),
+                "part_type": part.get("part_type"),
+                "author_type": (part.get("author") or {}).get("type"),
+                "author_id": (part.get("author") or {}).get("id"),
+                "author_name": (part.get("author") or {}).get("name"),
+                "body": part.get("body"),
+                "created_at": part.get("created_at")
+            }
+            for part in parts
+        ]
+    }
+
+
+def parquet_schema():
+    """The one schema every Parquet chunk is written with"""
+    import pyarrow
+
+    return pyarrow.schema([
+        ("id", pyarrow.string()),
+        ("ticket_type_id", pyarrow.string()),
+        ("ticket_type_name", pyarrow.string()),
+        ("state", pyarrow.string()),
+        ("created_at", pyarrow.int64()),
+        ("updated_at", pyarrow.int64()),
+        ("title", pyarrow.string()),
+        ("description", pyarrow.string()),
+        ("ticket_attributes", pyarrow.string()),  # JSON
+        ("contacts", pyarrow.list_(pyarrow.string())),
+        ("parts", pyarrow.string()),  # JSON
+    ])
+
+
+def to_parquet_row(record):
+    """Coerce a record to parquet_schema: IDs as strings, nested fields as JSON"""
+    def as_string(value):
+        if value is None:
+            return None
+        if isinstance(value, (dict, list)):
+            return json.dumps(value, ensure_ascii=False)
+        return str(value)
+
+    return {
+        "id": as_string(record["id"]),
+        "ticket_type_id": as_string(record["ticket_type_id"]),
+        "ticket_type_name": record["ticket_type_name"],
+        "state": as_string(record["state"]),
+        "created_at": record["created_at"],
+        "updated_at": record["updated_at"],
+        "title": as_string(record["title"]),
+        "description": as_string(record["description"]),
+        "ticket_attributes": json.dumps(record["ticket_attributes"], ensure_ascii=False),
+        "contacts": [as_string(contact) for contact in record["contacts"]],
+        "parts": json.dumps(record["parts"], ensure_ascii=False)
+    }
+
+
+class ChunkWriter:
+    """Writes records to numbered JSONL or Parquet chunk files
+
+    Chunks are written to a .tmp file and renamed when closed, so anything
+    still ending in .tmp after a crash is an incomplete chunk. Parquet rows
+    are held only until end_page(), which writes them as one row group.
+    """
+
+    def __init__(self, output_dir, file_format, chunk_index):
+        self.output_dir = output_dir
+        self.file_format = file_format
+        self.chunk_index = chunk_index
+        self.rows = 0
+        self.file = None
+        self.parquet_writer = None
+        self.buffer = []
+        self.schema = None
+
+        if file_format == "parquet":
+            try:
+                self.schema = parquet_schema()
+            except ImportError:
+                raise ValueError("Parquet export requires pyarrow (pip install pyarrow)")
+
+    @property
+    def filename(self):
+        extension = "jsonl" if self.file_format == "jsonl" else "parquet"
+        return f"part-{self.chunk_index:05d}.{extension}"
+
+    def write(self, record):
+        if self.file_format == "jsonl":
+            if self.file is None:
+                self.file = open(os.path.join(self.output_dir, self.filename + ".tmp"), "w", encoding="utf-8")
+            self.file.write(json.dumps(record, ensure_ascii=False) + "\n")
+        else:
+            self.buffer.append(to_parquet_row(record))
+        self.rows += 1
+
+    def end_page(self):
+        """Write the current search page's Parquet rows as a row group (no-op for JSONL)"""
+        if not self.buffer:
+            return
+
+        import pyarrow
+        import pyarrow.parquet
+
+        if self.parquet_writer is None:
+            # One explicit schema, so all-null or all-empty columns don't change type between chunks
+            self.parquet_writer = pyarrow.parquet.ParquetWriter(
+                os.path.join(self.output_dir, self.filename + ".tmp"), self.schema
+            )
+        self.parquet_writer.write_table(pyarrow.Table.from_pylist(self.buffer, schema=self.schema))
+        self.buffer = []
+
+    def close(self):
+        """Finish the current chunk; returns its manifest entry (None if empty)"""
+        if self.rows == 0:
+            return None
+
+        path = os.path.join(self.output_dir, self.filename)
+        if self.file_format == "jsonl":
+            self.file.close()
+            self.file = None
+        else:
+            self.end_page()
+            self.parquet_writer.close()
+            self.parquet_writer = None
+
+        os.replace(path + ".tmp", path)
+        entry = {"file": self.filename, "rows": self.rows}
+        self.chunk_index += 1
+        self.rows = 0
+        return entry
+
+
+def load_manifest(output_dir):
+    """Load an existing export manifest, if any"""
+    try:
+        with open(os.path.join(output_dir, MANIFEST_NAME), "r") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def save_manifest(output_dir, manifest):
+    """Atomically write the export manifest"""
+    path = os.path.join(output_dir, MANIFEST_NAME)
+    with open(path + ".tmp", "w") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(path + ".tmp", path)
+
+
+def export_tickets(output_dir, file_format="jsonl", created_after=None, created_before=None,
+                   ticket_type_ids=None, chunk_size=10000, workers=8):
+    """Stream matching tickets and their conversation parts into chunk files
+
+    Tickets are fetched one search page at a time and expanded in parallel, so
+    memory stays bounded by the page and chunk size. The manifest is updated
+    after each completed chunk with the search cursor to continue from; running
+    again with the same filters resumes from there.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    query = build_search_query(created_after, created_before, ticket_type_ids)
+
+    manifest = load_manifest(output_dir)
+    if manifest and manifest["query"] == query and manifest["format"] == file_format:
+        if manifest["complete"]:
+            print(f"✅ Export in '{output_dir}' is already complete ({manifest['rows']} tickets)")
+            return manifest
+        print(f"⏯️  Resuming export after {len(manifest['chunks'])} chunk(s), {manifest['rows']} tickets")
+    else:
+        if manifest:
+            print("⚠️  Existing manifest has different filters or format, starting a new export")
+        manifest = {
+            "query": query,
+            "format": file_format,
+            "chunks": [],
+            "rows": 0,
+            "cursor": None,
+            "complete": False,
+            "started_at": datetime.now(timezone.utc).isoformat()
+        }
+        save_manifest(output_dir, manifest)
+
+    # Drop chunks left behind by an interrupted run
+    finished_files = {chunk["file"] for chunk in manifest["chunks"]}
+    for filename in os.listdir(output_dir):
+        if filename.startswith("part-") and filename not in finished_files:
+            os.remove(os.path.join(output_dir, filename))
+
+    writer = ChunkWriter(output_dir, file_format, len(manifest["chunks"]))
+    cursor = manifest["cursor"]
+    manifest.setdefault("skipped", [])
+    skipped = []  # tickets gone by the time they were fetched, saved with the next chunk
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        while True:
+            tickets, next_cursor = search_tickets(query, cursor)
+
+            # executor.map keeps search order, so chunks are deterministic
+            ticket_ids = [ticket["id"] for ticket in tickets]
+            for ticket_id, ticket in zip(ticket_ids, executor.map(get_ticket, ticket_ids)):
+                if ticket is None:
+                    skipped.append(ticket_id)
+                else:
+                    writer.write(to_record(ticket))
+            writer.end_page()
+
+            cursor = next_cursor
+            done = not tickets or not cursor
+
+            # Chunks end on page boundaries so the saved cursor always matches the data on disk
+            if writer.rows >= chunk_size or done:
+                entry = writer.close()
+                if entry:
+                    manifest["chunks"].append(entry)
+                    manifest["rows"] += entry["rows"]
+                    print(f"💾 Wrote {entry['file']} ({entry['rows']} tickets, {manifest['rows']} total)")
+                if skipped:
+                    print(f"⏭️  Skipped {len(skipped)} ticket(s) deleted since the search")
+                    manifest["skipped"].extend(skipped)
+                    skipped = []
+                manifest["cursor"] = cursor
+                manifest["complete"] = done
+                if done:
+                    manifest["finished_at"] = datetime.now(timezone.utc).isoformat()
+                save_manifest(output_dir, manifest)
+
+            if done:
+                break
+
+    print(f"\n🎉 Exported {manifest['rows']} tickets in {len(manifest['chunks'])} chunk(s) to '{output_dir}'")
+    if manifest["skipped"]:
+        print(f"   {len(manifest['skipped'])} ticket(s) skipped (listed in the manifest)")
+    return manifest
+
+
+def parse_timestamp(value):
+    """Accept a unix timestamp or an ISO date/datetime (UTC if no timezone)"""
+    if value is None or value.isdigit():
+        return int(value) if value else None
+    parsed = datetime.fromisoformat(value)
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return int(parsed.timestamp())
+
+
+def resolve_ticket_types(values):
+    """Map ticket type names to IDs using ticket_type_ids.json; IDs pass through"""
+    if not values:
+        return None
+
+    try:
+        with open('ticket_type_ids.json', 'r') as f:
+            known_types = json.load(f)
+    except FileNotFoundError:
+        known_types = {}
+
+    resolved = []
+    for value in values:
+        if value in known_types:
+            resolved.append(known_types[value])
+        elif value.isdigit():
+            resolved.append(value)
+        else:
+            raise ValueError(f"Unknown ticket type '{value}' (not in ticket_type_ids.json)")
+    return resolved
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export Intercom tickets and conversation parts")
+    parser.add_argument("--output-dir", default="export", help="Directory for chunk files and manifest")
+    parser.add_argument("--format", choices=["jsonl", "parquet"], default="jsonl")
+    parser.add_argument("--since", help="Only tickets created after this (unix time or ISO date)")
+    parser.add_argument("--until", help="Only tickets created before this (unix time or ISO date)")
+    parser.add_argument("--ticket-type", action="append", help="Ticket type name or ID (repeatable)")
+    parser.add_argument("--chunk-size", type=int, default=10000, help="Tickets per chunk file")
+    parser.add_argument("--workers", type=int, default=8, help="Parallel ticket fetches")
+    args = parser.parse_args()
+
+    print("📤 Exporting tickets...")
+    print("=" * 60)
+    export_tickets(
+        args.output_dir,
+        file_format=args.format,
+        created_after=parse_timestamp(args.since),
+        created_before=parse_timestamp(args.until),
+        ticket_type_ids=resolve_ticket_types(args.ticket_type),
+        chunk_size=args.chunk_size,
+        workers=args.workers
+    )
+
+
+if __name__ == "__main__":
+    main()
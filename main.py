@@ -2,6 +2,8 @@
 import os
 from dotenv import load_dotenv
 import requests
+from profiling import profiled
+from resilience import hedged_get, get_breaker_states
 
 load_dotenv()
 
@@ -24,7 +26,7 @@ print("GETTING ALL TICKET TYPES AND THEIR ATTRIBUTES")
 print("="*60)
 
 url = "https://api.intercom.io/ticket_types"
-response = requests.get(url, headers=headers)
+response = hedged_get("ticket_types", url, headers)
 print("Status Code:", response.status_code)
 
 if response.status_code == 200:
@@ -246,6 +248,7 @@ print("\n" + "="*60)
 print("USER-SUPPORT COMMUNICATION")
 print("="*60)
 
+@profiled()
 def get_current_admin():
     """Get the current admin's information from the API"""
     admin_url = "https://api.intercom.io/me"
@@ -254,7 +257,7 @@ def get_current_admin():
         "Authorization": f"Bearer {intercom_access_token}"
     }
     
-    response = requests.get(admin_url, headers=admin_headers)
+    response = hedged_get("me", admin_url, admin_headers)
     if response.status_code == 200:
         admin_data = json.loads(response.text)
         admin_id = admin_data.get("id")
@@ -272,6 +275,7 @@ def get_current_admin():
         print(f"   Error: {response.text}")
         return None
 
+@profiled()
 def add_support_reply(ticket_id, admin_id, message):
     """Add a support staff reply to a ticket (visible to user)"""
     reply_url = f"https://api.intercom.io/tickets/{ticket_id}/reply"
@@ -292,6 +296,7 @@ def add_support_reply(ticket_id, admin_id, message):
     response = requests.post(reply_url, json=reply_payload, headers=reply_headers)
     return response
 
+@profiled()
 def add_user_reply(ticket_id, contact_id, message):
     """Add a user reply to a ticket"""
     reply_url = f"https://api.intercom.io/conversations/{ticket_id}/reply"
@@ -312,6 +317,7 @@ def add_user_reply(ticket_id, contact_id, message):
     response = requests.post(reply_url, json=reply_payload, headers=reply_headers)
     return response
 
+@profiled()
 def get_ticket_conversation(ticket_id):
     """Retrieve the conversation for a ticket"""
     ticket_url = f"https://api.intercom.io/tickets/{ticket_id}"
@@ -320,9 +326,10 @@ def get_ticket_conversation(ticket_id):
         "Authorization": f"Bearer {intercom_access_token}"
     } 
     
-    response = requests.get(ticket_url, headers=ticket_headers)
+    response = hedged_get("ticket", ticket_url, ticket_headers)
     return response
 
+@profiled()
 def create_or_update_user(user_email):
     """Create or update a user in Intercom"""
     user_url = "https://api.intercom.io/contacts"
@@ -340,6 +347,7 @@ def create_or_update_user(user_email):
     response = requests.post(user_url, json=user_payload, headers=user_headers)
     return response
 
+@profiled()
 def create_user_conversation(user_email, initial_message):
     """Create a new conversation started by a user"""
     conversation_url = "https://api.intercom.io/conversations"
@@ -360,6 +368,7 @@ def create_user_conversation(user_email, initial_message):
     response = requests.post(conversation_url, json=conversation_payload, headers=conversation_headers)
     return response
 
+@profiled()
 def display_conversation(conversation_data):
     """Display the conversation"""
     print(f"\n📋 Conversation #{conversation_data.get('id')}")
@@ -389,6 +398,7 @@ def display_conversation(conversation_data):
                 print(f"👨‍💼 Support ({author_name}): {body}")
             print()
 
+@profiled()
 def workflow_standalone_conversation(admin_id):
     """Workflow 1: User starts a standalone conversation"""
     print("\n🔸 WORKFLOW 1: Standalone Conversation")
@@ -444,7 +454,7 @@ def workflow_standalone_conversation(admin_id):
             "Authorization": f"Bearer {intercom_access_token}"
         }
         
-        get_response = requests.get(get_conversation_url, headers=get_conversation_headers)
+        get_response = hedged_get("conversation", get_conversation_url, get_conversation_headers)
         if get_response.status_code == 200:
             full_conversation_data = json.loads(get_response.text)
             display_conversation(full_conversation_data)
@@ -454,6 +464,7 @@ def workflow_standalone_conversation(admin_id):
         print(f"   ❌ Conversation creation failed: {conversation_response.status_code}")
         print(f"   Error: {conversation_response.text}")
 
+@profiled()
 def workflow_ticket_to_conversation(admin_id, ticket_id):
     """Workflow 2: Start with ticket, then create conversation"""
     print("\n🔸 WORKFLOW 2: Ticket-Based Conversation")
@@ -529,4 +540,9 @@ print("   • Users can reply to tickets")
 print("   • Support staff can respond to users")
 print("   • View full conversation history")
 print("   • Auto-retrieve admin ID from API")
-print("\n💡 No additional setup required - uses your access token to get admin info!")
\ No newline at end of file
+print("\n💡 No additional setup required - uses your access token to get admin info!")
+
+print("\n🩺 Endpoint health:")
+for endpoint, state in get_breaker_states().items():
+    p95 = f"{state['p95']:.2f}s" if state["p95"] is not None else "n/a"
+    print(f"   {endpoint}: {state['state']} (p95 {p95}, {state['total_failures']} failures)")
\ No newline at end of file
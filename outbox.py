@@ -0,0 +1,373 @@
+import requests
+import os
+import json
+import sqlite3
+import threading
+import time
+import uuid
+from email.utils import parsedate_to_datetime
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Get access token from environment
+intercom_access_token = os.getenv("INTERCOM_ACCESS_TOKEN")
+
+if not intercom_access_token:
+    raise ValueError("INTERCOM_ACCESS_TOKEN not found in environment variables")
+
+# Outbox settings (override with environment variables)
+OUTBOX_PATH = os.getenv("INTERCOM_OUTBOX_PATH", "intercom_outbox.db")
+OUTBOX_WORKERS = int(os.getenv("INTERCOM_OUTBOX_WORKERS", "4"))
+OUTBOX_MAX_ATTEMPTS = int(os.getenv("INTERCOM_OUTBOX_MAX_ATTEMPTS", "8"))
+OUTBOX_REQUESTS_PER_SECOND = float(os.getenv("INTERCOM_OUTBOX_RPS", "10"))
+OUTBOX_LEASE_SECONDS = 60
+OUTBOX_REQUEST_TIMEOUT = 30
+
+# Status codes worth retrying; anything else that isn't 200/201 goes to the dead letter
+RETRYABLE_STATUS_CODES = {408, 409, 429, 500, 502, 503, 504}
+
+_local = threading.local()
+
+
+def get_connection(path=OUTBOX_PATH):
+    """Get this thread's SQLite connection to the outbox, creating the table if needed"""
+    connections = getattr(_local, "connections", None)
+    if connections is None:
+        connections = _local.connections = {}
+
+    if path not in connections:
+        connection = sqlite3.connect(path, timeout=30, isolation_level=None)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        connection.execute("""
+            CREATE TABLE IF NOT EXISTS outbox (
+                id TEXT PRIMARY KEY,
+                kind TEXT NOT NULL,
+                method TEXT NOT NULL,
+                url TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                status TEXT NOT NULL DEFAULT 'pending',
+                attempts INTEGER NOT NULL DEFAULT 0,
+                available_at REAL NOT NULL,
+                created_at REAL NOT NULL,
+                updated_at REAL NOT NULL,
+                response_status INTEGER,
+                response_body TEXT,
+                last_error TEXT
+            )
+        """)
+        connection.execute(
+            "CREATE INDEX IF NOT EXISTS outbox_ready ON outbox (status, available_at)"
+        )
+        connections[path] = connection
+
+    return connections[path]
+
+
+def enqueue(kind, method, url, payload, path=OUTBOX_PATH):
+    """Persist a write to the outbox and return its enqueue ID"""
+    enqueue_id = uuid.uuid4().hex
+    now = time.time()
+    get_connection(path).execute(
+        "INSERT INTO outbox (id, kind, method, url, payload, available_at, created_at, updated_at) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+        (enqueue_id, kind, method, url, json.dumps(payload), now, now, now)
+    )
+    return enqueue_id
+
+
+def enqueue_ticket(ticket_type_id, customer_email, ticket_attributes, path=OUTBOX_PATH):
+    """Queue a ticket creation (same payload as create_ticket)"""
+    payload = {
+        "contacts": [
+            {
+                "email": customer_email
+            }
+        ],
+        "ticket_attributes": ticket_attributes,
+        "ticket_type_id": ticket_type_id
+    }
+    return enqueue("create_ticket", "POST", "https://api.intercom.io/tickets", payload, path)
+
+
+def enqueue_support_reply(ticket_id, admin_id, message, path=OUTBOX_PATH):
+    """Queue a support staff reply to a ticket (same payload as add_support_reply)"""
+    payload = {
+        "message_type": "note",
+        "type": "admin",
+        "admin_id": admin_id,
+        "body": message
+    }
+    return enqueue("add_support_reply", "POST", f"https://api.intercom.io/tickets/{ticket_id}/reply", payload, path)
+
+
+def enqueue_user_conversation(user_email, initial_message, path=OUTBOX_PATH):
+    """Queue a new user conversation (same payload as create_user_conversation)"""
+    payload = {
+        "from": {
+            "type": "user",
+            "email": user_email
+        },
+        "body": initial_message
+    }
+    return enqueue("create_user_conversation", "POST", "https://api.intercom.io/conversations", payload, path)
+
+
+def get_status(enqueue_id, path=OUTBOX_PATH):
+    """Look up a queued write by enqueue ID"""
+    row = get_connection(path).execute(
+        "SELECT id, kind, status, attempts, response_status, response_body, last_error, created_at, updated_at "
+        "FROM outbox WHERE id = ?",
+        (enqueue_id,)
+    ).fetchone()
+
+    if row is None:
+        return None
+
+    return {
+        "id": row[0],
+        "kind": row[1],
+        "status": row[2],
+        "attempts": row[3],
+        "response_status": row[4],
+        "response": json.loads(row[5]) if row[5] else None,
+        "last_error": row[6],
+        "created_at": row[7],
+        "updated_at": row[8]
+    }
+
+
+def get_counts(path=OUTBOX_PATH):
+    """Count outbox entries by status"""
+    rows = get_connection(path).execute("SELECT status, COUNT(*) FROM outbox GROUP BY status").fetchall()
+    return {status: count for status, count in rows}
+
+
+def get_dead_letters(limit=100, path=OUTBOX_PATH):
+    """List writes that exhausted their retries or were rejected by Intercom"""
+    rows = get_connection(path).execute(
+        "SELECT id FROM outbox WHERE status = 'dead' ORDER BY updated_at LIMIT ?", (limit,)
+    ).fetchall()
+    return [get_status(row[0], path) for row in rows]
+
+
+def requeue_dead_letter(enqueue_id, path=OUTBOX_PATH):
+    """Send a dead-lettered write back to the queue with a fresh attempt count"""
+    cursor = get_connection(path).execute(
+        "UPDATE outbox SET status = 'pending', attempts = 0, available_at = ?, updated_at = ? "
+        "WHERE id = ? AND status = 'dead'",
+        (time.time(), time.time(), enqueue_id)
+    )
+    return cursor.rowcount == 1
+
+
+def claim_next(path=OUTBOX_PATH):
+    """Lease the next ready write; in-flight writes whose lease expired are picked up again"""
+    connection = get_connection(path)
+    now = time.time()
+
+    connection.execute("BEGIN IMMEDIATE")
+    try:
+        row = connection.execute(
+            "SELECT id, method, url, payload, attempts FROM outbox "
+            "WHERE status IN ('pending', 'in_flight') AND available_at <= ? "
+            "ORDER BY available_at LIMIT 1",
+            (now,)
+        ).fetchone()
+
+        if row is not None:
+            connection.execute(
+                "UPDATE outbox SET status = 'in_flight', attempts = attempts + 1, available_at = ?, updated_at = ? "
+                "WHERE id = ?",
+                (now + OUTBOX_LEASE_SECONDS, now, row[0])
+            )
+        connection.execute("COMMIT")
+    except Exception:
+        connection.execute("ROLLBACK")
+        raise
+
+    if row is None:
+        return None
+
+    return {
+        "id": row[0],
+        "method": row[1],
+        "url": row[2],
+        "payload": json.loads(row[3]),
+        "attempts": row[4] + 1
+    }
+
+
+def complete(entry, status, response_status=None, response_body=None, error=None, retry_at=None, path=OUTBOX_PATH):
+    """Record the outcome of a delivery attempt
+
+    Only the worker holding the current lease (matched on the attempts count)
+    may record an outcome; returns False if the lease was lost to another worker.
+    """
+    cursor = get_connection(path).execute(
+        "UPDATE outbox SET status = ?, available_at = ?, updated_at = ?, "
+        "response_status = ?, response_body = ?, last_error = ? "
+        "WHERE id = ? AND attempts = ? AND status = 'in_flight'",
+        (status, retry_at or time.time(), time.time(), response_status, response_body, error,
+         entry["id"], entry["attempts"])
+    )
+    return cursor.rowcount == 1
+
+
+def parse_retry_after(value, default):
+    """Parse a Retry-After header given in seconds or as an HTTP date"""
+    if value is None:
+        return default
+    try:
+        return max(float(value), 0)
+    except ValueError:
+        pass
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0)
+    except (TypeError, ValueError):
+        return default
+
+
+class RateLimiter:
+    """Spaces requests so the whole worker pool stays within the rate budget"""
+
+    def __init__(self, requests_per_second):
+        self.interval = 1.0 / requests_per_second if requests_per_second > 0 else 0
+        self.next_slot = time.monotonic()
+        self.lock = threading.Lock()
+
+    def wait(self):
+        with self.lock:
+            now = time.monotonic()
+            slot = max(self.next_slot, now)
+            self.next_slot = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+    def push_back(self, seconds):
+        """Hold off every worker, e.g. after a 429
+
+        Capped well below the lease so a leased entry is always sent before
+        another worker could re-claim it.
+        """
+        seconds = min(seconds, OUTBOX_LEASE_SECONDS / 2)
+        with self.lock:
+            self.next_slot = max(self.next_slot, time.monotonic() + seconds)
+
+
+def deliver(entry, rate_limiter, path=OUTBOX_PATH):
+    """Send one leased write to Intercom and record the result
+
+    The caller must already hold a rate slot (see worker_loop).
+    """
+    headers = {
+        "Intercom-Version": "2.9",
+        "accept": "application/json",
+        "authorization": f"Bearer {intercom_access_token}",
+        "content-type": "application/json"
+    }
+    backoff = min(2 ** entry["attempts"], 300)
+
+    try:
+        response = requests.request(entry["method"], entry["url"], headers=headers, json=entry["payload"],
+                                    timeout=OUTBOX_REQUEST_TIMEOUT)
+    except Exception as e:
+        status = "dead" if entry["attempts"] >= OUTBOX_MAX_ATTEMPTS else "pending"
+        complete(entry, status, error=str(e), retry_at=time.time() + backoff, path=path)
+        return status
+
+    if response.status_code in [200, 201]:
+        complete(entry, "delivered", response.status_code, response.text, path=path)
+        return "delivered"
+
+    if response.status_code == 429:
+        retry_after = parse_retry_after(response.headers.get("Retry-After"), backoff)
+        rate_limiter.push_back(retry_after)
+        backoff = max(backoff, retry_after)
+
+    if response.status_code in RETRYABLE_STATUS_CODES and entry["attempts"] < OUTBOX_MAX_ATTEMPTS:
+        status = "pending"
+    else:
+        status = "dead"
+
+    complete(entry, status, response.status_code, None,
+             f"{response.status_code}: {response.text}", time.time() + backoff, path)
+    return status
+
+
+def worker_loop(stop_event, rate_limiter, path=OUTBOX_PATH, poll_interval=0.5):
+    """Drain the outbox until stop_event is set"""
+    while not stop_event.is_set():
+        # Take the rate slot before leasing, so time spent waiting never eats into the lease
+        rate_limiter.wait()
+
+        try:
+            entry = claim_next(path)
+        except Exception as e:
+            print(f"⚠️  Could not claim from outbox, retrying: {str(e)}")
+            stop_event.wait(poll_interval)
+            continue
+
+        if entry is None:
+            stop_event.wait(poll_interval)
+            continue
+
+        try:
+            status = deliver(entry, rate_limiter, path)
+        except Exception as e:
+            # Never let one bad entry take the worker down; retry it later
+            print(f"⚠️  Delivery of {entry['id']} failed: {str(e)}")
+            status = "dead" if entry["attempts"] >= OUTBOX_MAX_ATTEMPTS else "pending"
+            try:
+                complete(entry, status, error=str(e),
+                         retry_at=time.time() + min(2 ** entry["attempts"], 300), path=path)
+            except Exception as e:
+                print(f"⚠️  Could not record failure for {entry['id']}, lease will expire: {str(e)}")
+
+        if status == "dead":
+            print(f"❌ Dead-lettered {entry['id']} after {entry['attempts']} attempt(s)")
+
+
+def start_workers(workers=OUTBOX_WORKERS, requests_per_second=OUTBOX_REQUESTS_PER_SECOND, path=OUTBOX_PATH):
+    """Start the worker pool; returns (stop_event, threads)"""
+    get_connection(path)  # create the table before the workers race for it
+    stop_event = threading.Event()
+    rate_limiter = RateLimiter(requests_per_second)
+
+    threads = []
+    for i in range(workers):
+        thread = threading.Thread(
+            target=worker_loop, args=(stop_event, rate_limiter, path),
+            name=f"outbox-worker-{i}", daemon=True
+        )
+        thread.start()
+        threads.append(thread)
+
+    return stop_event, threads
+
+
+def stop_workers(stop_event, threads, timeout=None):
+    """Ask the workers to finish their current write and exit"""
+    stop_event.set()
+    for thread in threads:
+        thread.join(timeout)
+
+
+def main():
+    print(f"📬 Draining outbox '{OUTBOX_PATH}' with {OUTBOX_WORKERS} workers at {OUTBOX_REQUESTS_PER_SECOND} req/s")
+    print(f"   Queue: {get_counts()}")
+    stop_event, threads = start_workers()
+
+    try:
+        while True:
+            time.sleep(10)
+            print(f"   Queue: {get_counts()}")
+    except KeyboardInterrupt:
+        print("\n⏹️  Stopping workers...")
+        stop_workers(stop_event, threads)
+        print(f"   Queue: {get_counts()}")
+
+
+if __name__ == "__main__":
+    main()
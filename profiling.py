@@ -0,0 +1,340 @@
+import atexit
+import cProfile
+import functools
+import io
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+
+def _profile_mode():
+    """"cprofile", "sample" or None, from INTERCOM_PROFILE or a --profile[=sample] flag"""
+    value = os.getenv("INTERCOM_PROFILE", "").lower()
+    for arg in sys.argv:
+        if arg == "--profile":
+            value = value or "1"
+        elif arg.startswith("--profile="):
+            value = arg.split("=", 1)[1].lower()
+
+    if value in ["1", "true", "yes", "cprofile"]:
+        return "cprofile"
+    if value == "sample":
+        return "sample"
+    return None
+
+
+# INTERCOM_PROFILE=1 (or --profile) records cProfile stats per phase; INTERCOM_PROFILE=sample
+# (or --profile=sample) records sampled stacks for flamegraphs instead. The two never run
+# together: from Python 3.12 cProfile sees every thread, so the sampler would profile itself.
+# Both modes record tracemalloc top allocators; tracing every allocation slows allocation-heavy
+# code, so set INTERCOM_PROFILE_MEMORY=0 when only timings matter.
+PROFILE_MODE = _profile_mode()
+PROFILE_ENABLED = PROFILE_MODE is not None
+PROFILE_MEMORY = os.getenv("INTERCOM_PROFILE_MEMORY", "1").lower() not in ["0", "false", "no"]
+PROFILE_DIR = os.getenv("INTERCOM_PROFILE_DIR", "profiles")
+PROFILE_SAMPLE_INTERVAL = float(os.getenv("INTERCOM_PROFILE_SAMPLE_INTERVAL", "0.005"))
+PROFILE_TOP_ALLOCATORS = 15
+
+# Where cProfile time goes, grouped so network, JSON, printing and our own code can be compared
+TIME_CATEGORIES = [
+    ("network", ["requests", "urllib3", "socket", "ssl", "http/client", "http\\client", "_ssl", "_socket"]),
+    ("json", ["json", "_json"]),
+    ("printing", ["builtins.print", "TextIOWrapper", "method 'write'"]),
+]
+
+_lock = threading.Lock()
+_local = threading.local()
+_active_phases = {}  # thread ident -> stack of phase names
+_phase_calls = Counter()
+_phase_seconds = Counter()
+_phase_memory = Counter()  # phase -> net bytes still allocated when the phase ended
+_phase_profiles = {}  # phase -> pstats.Stats
+_phase_samples = defaultdict(Counter)  # phase -> collapsed stack -> samples
+_phase_allocations = defaultdict(Counter)  # phase -> "file:line" -> bytes (outermost phases)
+_started = False
+
+
+def _start():
+    """Start tracemalloc, the stack sampler (sample mode) and the report writer"""
+    global _started
+    with _lock:
+        if _started:
+            return
+        _started = True
+
+    if PROFILE_MEMORY:
+        tracemalloc.start()
+    if PROFILE_MODE == "sample":
+        threading.Thread(target=_sample_loop, name="profiling-sampler", daemon=True).start()
+    atexit.register(write_reports)
+
+
+def _sample_loop():
+    """Record the stack of every thread that is inside a profiled phase"""
+    while True:
+        time.sleep(PROFILE_SAMPLE_INTERVAL)
+        frames = sys._current_frames()
+
+        with _lock:
+            for thread_id, phases in _active_phases.items():
+                frame = frames.get(thread_id)
+                if not phases or phases[-1] is None or frame is None:
+                    continue
+
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    if code.co_filename != __file__:
+                        stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                _phase_samples[phases[-1]][";".join(reversed(stack))] += 1
+
+
+class _StatsDelta:
+    """Profile-like holder so pstats.Stats can load a diff of two snapshots"""
+
+    def __init__(self, stats):
+        self.stats = stats
+
+    def create_stats(self):
+        pass
+
+
+def _snapshot(profile):
+    """Copy a (disabled) profile's stats so far"""
+    profile.create_stats()
+    return dict(profile.stats)
+
+
+def _stats_delta(before, after):
+    """What ran between two snapshots of the same profile"""
+    delta = {}
+    for func, (cc, nc, tt, ct, callers) in after.items():
+        if func in before:
+            old_cc, old_nc, old_tt, old_ct, old_callers = before[func]
+            if nc == old_nc:
+                continue
+            cc, nc, tt, ct = cc - old_cc, nc - old_nc, tt - old_tt, ct - old_ct
+            callers = {
+                caller: tuple(value - old for value, old in zip(counts, old_callers.get(caller, (0,) * len(counts))))
+                if isinstance(counts, tuple) else counts - old_callers.get(caller, 0)
+                for caller, counts in callers.items()
+            }
+        delta[func] = (cc, nc, tt, ct, callers)
+    return delta
+
+
+@contextmanager
+def profile_phase(phase):
+    """Profile a block of code as a named phase (does nothing when profiling is off)
+
+    The outermost phase on a thread takes tracemalloc snapshots (for top
+    allocators) and owns the cProfile; nested phases only read counters and
+    diff the shared profile. Time spent on this bookkeeping is subtracted
+    from every enclosing phase, so phase timings measure the code itself.
+    """
+    if not PROFILE_ENABLED:
+        yield
+        return
+
+    entered = time.perf_counter()
+    _start()
+    thread_id = threading.get_ident()
+    outer_profile = getattr(_local, "profile", None)
+    outermost = not getattr(_local, "depth", 0)
+    _local.depth = getattr(_local, "depth", 0) + 1
+    if outermost:
+        _local.overhead = 0.0
+
+    # Keep bookkeeping out of the enclosing phase's profile and samples
+    with _lock:
+        _active_phases.setdefault(thread_id, []).append(None)
+    if outer_profile is not None:
+        outer_profile.disable()
+
+    snapshot_before = tracemalloc.take_snapshot() if outermost and PROFILE_MEMORY else None
+    memory_before = tracemalloc.get_traced_memory()[0]
+
+    # Only one cProfile can run per thread, so nested phases reuse the outer
+    # profile and get their own stats from the difference of two snapshots
+    stats_before = None
+    profile = None
+    if PROFILE_MODE == "cprofile":
+        if outer_profile is not None:
+            stats_before = _snapshot(outer_profile)
+            profile = outer_profile
+        elif outermost:
+            profile = cProfile.Profile()
+
+    with _lock:
+        _active_phases[thread_id][-1] = phase
+    overhead_before = _local.overhead
+    started = time.perf_counter()
+    if profile is not None:
+        try:
+            profile.enable()
+        except ValueError:
+            # Python 3.12+ allows one active cProfile per process (e.g. a phase on another thread)
+            profile = None
+    _local.profile = profile
+
+    try:
+        yield
+    finally:
+        if profile is not None:
+            profile.disable()
+        finished = time.perf_counter()
+        # Bookkeeping of nested phases happened inside this window; don't count it
+        elapsed = finished - started - (_local.overhead - overhead_before)
+        with _lock:
+            _active_phases[thread_id][-1] = None
+
+        memory_delta = tracemalloc.get_traced_memory()[0] - memory_before
+        allocations = []
+        if snapshot_before is not None:
+            allocation_filters = [
+                tracemalloc.Filter(False, tracemalloc.__file__),
+                tracemalloc.Filter(False, __file__),
+            ]
+            allocations = tracemalloc.take_snapshot().filter_traces(allocation_filters).compare_to(
+                snapshot_before.filter_traces(allocation_filters), "lineno"
+            )
+
+        phase_stats = None
+        if profile is not None:
+            if outer_profile is None:
+                phase_stats = profile
+            else:
+                phase_stats = _StatsDelta(_stats_delta(stats_before, _snapshot(profile)))
+
+        with _lock:
+            _active_phases[thread_id].pop()
+            _phase_calls[phase] += 1
+            _phase_seconds[phase] += elapsed
+            _phase_memory[phase] += memory_delta
+
+            for stat in allocations:
+                if stat.size_diff > 0:
+                    frame = stat.traceback[0]
+                    _phase_allocations[phase][f"{frame.filename}:{frame.lineno}"] += stat.size_diff
+
+            if phase_stats is not None:
+                if phase in _phase_profiles:
+                    _phase_profiles[phase].add(phase_stats)
+                else:
+                    _phase_profiles[phase] = pstats.Stats(phase_stats)
+
+        _local.profile = outer_profile
+        _local.depth -= 1
+        _local.overhead += (started - entered) + (time.perf_counter() - finished)
+        if outer_profile is not None:
+            outer_profile.enable()
+
+
+def profiled(phase=None):
+    """Decorator that profiles a function as a phase; returns the function untouched when profiling is off"""
+    def decorator(func):
+        if not PROFILE_ENABLED:
+            return func
+
+        module = os.path.splitext(os.path.basename(func.__code__.co_filename))[0]
+        name = phase or f"{module}.{func.__qualname__}"
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with profile_phase(name):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def _hedged_read_wait(stats):
+    """Time resilience.hedged_get spent waiting on its executor threads for a response"""
+    waited = 0.0
+    for (filename, _, function_name), (_, _, _, _, callers) in stats.stats.items():
+        if function_name != "wait" or not filename.replace("\\", "/").endswith("concurrent/futures/_base.py"):
+            continue
+        for (caller_file, _, caller_name), counts in callers.items():
+            if caller_name == "hedged_get" and os.path.basename(caller_file) == "resilience.py":
+                waited += counts[3] if isinstance(counts, tuple) else 0.0
+    return waited
+
+
+def _categorize(stats):
+    """Split cProfile self time into network / json / printing / other"""
+    totals = Counter()
+    lock_wait = 0.0
+    for (filename, _, function_name), (_, _, self_time, _, _) in stats.stats.items():
+        location = f"{filename} {function_name}"
+        for category, markers in TIME_CATEGORIES:
+            if any(marker in location for marker in markers):
+                totals[category] += self_time
+                break
+        else:
+            totals["other"] += self_time
+            if "acquire' of '_thread" in function_name:
+                lock_wait += self_time
+
+    # Hedged reads run on resilience's executor threads. Before Python 3.12 cProfile only sees
+    # the calling thread, where that network time is a lock wait; count it as network. From
+    # 3.12 the executor threads are profiled directly and the wait has no self time to move.
+    moved = min(_hedged_read_wait(stats), lock_wait, totals["other"])
+    if moved > 0:
+        totals["other"] -= moved
+        totals["network"] += moved
+    return totals
+
+
+def write_reports(output_dir=None):
+    """Write per-phase cProfile stats, collapsed stacks, top allocators and a summary"""
+    output_dir = output_dir or PROFILE_DIR
+    os.makedirs(output_dir, exist_ok=True)
+
+    with _lock:
+        phases = sorted(_phase_calls, key=lambda name: _phase_seconds[name], reverse=True)
+        summary = [f"PROFILE SUMMARY ({PROFILE_MODE} mode)", "=" * 60]
+
+        for phase in phases:
+            line = f"{phase}: {_phase_calls[phase]} call(s), {_phase_seconds[phase]:.3f}s"
+            if PROFILE_MEMORY:
+                line += f", net memory {_phase_memory[phase] / 1024:+.1f} KiB"
+            summary.append(line)
+
+            stats = _phase_profiles.get(phase)
+            if stats is not None:
+                stats.dump_stats(os.path.join(output_dir, f"{phase}.prof"))
+
+                categories = _categorize(stats)
+                total = sum(categories.values()) or 1
+                breakdown = ", ".join(
+                    f"{category} {seconds:.3f}s ({seconds / total:.0%})"
+                    for category, seconds in categories.most_common()
+                )
+                summary.append(f"   Time by category: {breakdown}")
+
+                text = io.StringIO()
+                stats.stream = text
+                stats.sort_stats("cumulative").print_stats(30)
+                with open(os.path.join(output_dir, f"{phase}.pstats.txt"), "w") as f:
+                    f.write(text.getvalue())
+
+            if _phase_samples[phase]:
+                with open(os.path.join(output_dir, f"{phase}.collapsed"), "w") as f:
+                    for stack, count in _phase_samples[phase].most_common():
+                        f.write(f"{stack} {count}\n")
+
+            if _phase_allocations[phase]:
+                with open(os.path.join(output_dir, f"{phase}.alloc.txt"), "w") as f:
+                    for location, size in _phase_allocations[phase].most_common(PROFILE_TOP_ALLOCATORS):
+                        f.write(f"{size / 1024:10.1f} KiB  {location}\n")
+
+    with open(os.path.join(output_dir, "summary.txt"), "w") as f:
+        f.write("\n".join(summary) + "\n")
+
+    print(f"\n📊 Profiling reports written to '{output_dir}/'")
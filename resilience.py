@@ -0,0 +1,257 @@
+import requests
+import os
+import copy
+import time
+import threading
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+# Per-endpoint latency deadlines in seconds (override with INTERCOM_DEADLINE_<ENDPOINT>)
+ENDPOINT_DEADLINES = {
+    "me": 3.0,
+    "ticket": 5.0,
+    "conversation": 5.0,
+    "ticket_types": 5.0,
+}
+DEFAULT_DEADLINE = 10.0
+
+# Hedge after this delay until enough samples exist to use the endpoint's p95
+DEFAULT_HEDGE_DELAY = 1.0
+MIN_HEDGE_DELAY = 0.05
+MIN_LATENCY_SAMPLES = 20
+LATENCY_WINDOW = 200
+
+# Open a breaker after this many consecutive failures, and probe again after the cooldown
+BREAKER_FAILURE_THRESHOLD = 5
+BREAKER_COOLDOWN = 30.0
+
+# Last good responses served while an endpoint is degraded (least recently used are dropped)
+CACHE_MAX_ENTRIES = 256
+
+_executor = ThreadPoolExecutor(max_workers=16, thread_name_prefix="hedged-read")
+_lock = threading.Lock()
+_latencies = {}
+_breakers = {}
+_cache = OrderedDict()
+
+
+def get_deadline(endpoint):
+    """Latency deadline for an endpoint, in seconds"""
+    override = os.getenv(f"INTERCOM_DEADLINE_{endpoint.upper()}")
+    if override:
+        return float(override)
+    return ENDPOINT_DEADLINES.get(endpoint, DEFAULT_DEADLINE)
+
+
+class LatencyTracker:
+    """Rolling window of request attempt latencies for one endpoint"""
+
+    def __init__(self, window=LATENCY_WINDOW):
+        self.samples = deque(maxlen=window)
+        self.lock = threading.Lock()
+
+    def record(self, seconds):
+        with self.lock:
+            self.samples.append(seconds)
+
+    def percentile(self, fraction):
+        with self.lock:
+            samples = sorted(self.samples)
+        if not samples:
+            return None
+        return samples[min(len(samples) - 1, int(fraction * len(samples)))]
+
+    def hedge_delay(self):
+        """Wait this long for the first request before sending a duplicate"""
+        with self.lock:
+            enough = len(self.samples) >= MIN_LATENCY_SAMPLES
+        if not enough:
+            return DEFAULT_HEDGE_DELAY
+        return max(self.percentile(0.95), MIN_HEDGE_DELAY)
+
+
+class CircuitBreaker:
+    """closed -> open after repeated failures -> half_open (one probe) -> closed"""
+
+    def __init__(self, failure_threshold=BREAKER_FAILURE_THRESHOLD, cooldown=BREAKER_COOLDOWN):
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.state = "closed"
+        self.consecutive_failures = 0
+        self.opened_at = None
+        self.probe_in_flight = False
+        self.total_failures = 0
+        self.total_successes = 0
+        self.rejected = 0
+        self.lock = threading.Lock()
+
+    def allow(self):
+        """Whether a request may go out now"""
+        with self.lock:
+            if self.state == "open" and time.monotonic() - self.opened_at >= self.cooldown:
+                self.state = "half_open"
+
+            if self.state == "closed":
+                return True
+            if self.state == "half_open" and not self.probe_in_flight:
+                self.probe_in_flight = True
+                return True
+
+            self.rejected += 1
+            return False
+
+    def record_success(self):
+        with self.lock:
+            self.state = "closed"
+            self.consecutive_failures = 0
+            self.probe_in_flight = False
+            self.total_successes += 1
+
+    def record_failure(self):
+        with self.lock:
+            self.consecutive_failures += 1
+            self.total_failures += 1
+            self.probe_in_flight = False
+            if self.state == "half_open" or self.consecutive_failures >= self.failure_threshold:
+                self.state = "open"
+                self.opened_at = time.monotonic()
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                "state": self.state,
+                "consecutive_failures": self.consecutive_failures,
+                "total_failures": self.total_failures,
+                "total_successes": self.total_successes,
+                "rejected": self.rejected,
+                "open_for": time.monotonic() - self.opened_at if self.state != "closed" else 0.0
+            }
+
+
+def _get_endpoint(endpoint):
+    with _lock:
+        if endpoint not in _breakers:
+            _breakers[endpoint] = CircuitBreaker()
+            _latencies[endpoint] = LatencyTracker()
+        return _breakers[endpoint], _latencies[endpoint]
+
+
+def get_breaker_states():
+    """Breaker state and latency percentiles for every endpoint, for monitoring"""
+    with _lock:
+        endpoints = list(_breakers)
+
+    states = {}
+    for endpoint in endpoints:
+        breaker, latencies = _get_endpoint(endpoint)
+        states[endpoint] = breaker.snapshot()
+        states[endpoint]["p50"] = latencies.percentile(0.5)
+        states[endpoint]["p95"] = latencies.percentile(0.95)
+        states[endpoint]["p99"] = latencies.percentile(0.99)
+    return states
+
+
+def _is_failure(response):
+    return response.status_code == 429 or response.status_code >= 500
+
+
+def _error_response(url, status_code, message):
+    """Build a response callers can handle like any other failed request"""
+    response = requests.Response()
+    response.status_code = status_code
+    response.url = url
+    response._content = message.encode("utf-8")
+    return response
+
+
+def _cached_or_error(url, status_code, message):
+    with _lock:
+        cached = _cache.get(url)
+        if cached is not None:
+            _cache.move_to_end(url)
+    if cached is None:
+        return _error_response(url, status_code, message)
+
+    stale = copy.copy(cached)
+    stale.headers = copy.copy(cached.headers)
+    stale.headers["X-Served-From-Cache"] = "true"
+    return stale
+
+
+def _remember(url, response):
+    with _lock:
+        _cache[url] = response
+        _cache.move_to_end(url)
+        while len(_cache) > CACHE_MAX_ENTRIES:
+            _cache.popitem(last=False)
+
+
+def _timed_get(url, headers, timeout, latencies):
+    """One attempt; its latency is recorded even if it loses the race or times out"""
+    started = time.monotonic()
+    try:
+        response = requests.get(url, headers=headers, timeout=timeout)
+    except requests.Timeout:
+        latencies.record(time.monotonic() - started)
+        raise
+
+    # Fast 429/5xx answers say nothing about how long a good response takes
+    if not _is_failure(response):
+        latencies.record(time.monotonic() - started)
+    return response
+
+
+def hedged_get(endpoint, url, headers):
+    """GET with a deadline, a hedged duplicate after the endpoint's p95, and a circuit breaker
+
+    The first successful response wins. A duplicate is only sent when the
+    first attempt is slow; a fast 429/5xx or connection error is returned
+    straight away (counting against the breaker) rather than retried. When
+    the breaker is open or the deadline passes, the last good response for the
+    URL is served (marked with an X-Served-From-Cache header), or a 503/504
+    response if there is none.
+    """
+    breaker, latencies = _get_endpoint(endpoint)
+    if not breaker.allow():
+        return _cached_or_error(url, 503, f"Circuit breaker open for '{endpoint}'")
+
+    deadline = get_deadline(endpoint)
+    started = time.monotonic()
+    pending = {_executor.submit(_timed_get, url, headers, deadline, latencies)}
+    hedged = breaker.state == "half_open"  # don't double the load on a recovering endpoint
+
+    while pending:
+        remaining = deadline - (time.monotonic() - started)
+        if remaining <= 0:
+            break
+
+        wait_for = remaining if hedged else min(latencies.hedge_delay(), remaining)
+        done, pending = wait(pending, timeout=wait_for, return_when=FIRST_COMPLETED)
+
+        for future in done:
+            try:
+                response = future.result()
+            except Exception as e:
+                if pending:
+                    continue  # the other attempt may still succeed
+                breaker.record_failure()
+                return _cached_or_error(url, 503, f"Request to '{endpoint}' failed: {str(e)}")
+
+            if _is_failure(response):
+                if pending:
+                    continue
+                breaker.record_failure()
+                return response
+
+            breaker.record_success()
+            if response.status_code == 200:
+                _remember(url, response)
+            return response
+
+        if not done and not hedged:
+            # First attempt is slower than the endpoint's p95: send one duplicate
+            pending.add(_executor.submit(_timed_get, url, headers, remaining, latencies))
+            hedged = True
+
+    breaker.record_failure()
+    return _cached_or_error(url, 504, f"Request to '{endpoint}' exceeded its {deadline:.1f}s deadline")
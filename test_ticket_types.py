@@ -3,6 +3,8 @@ import os
 import json
 import time
 from dotenv import load_dotenv
+from profiling import profiled
+from classifier import load_classifier, route_ticket_type
 
 load_dotenv()
 
@@ -12,6 +14,7 @@ intercom_access_token = os.getenv("INTERCOM_ACCESS_TOKEN")
 if not intercom_access_token:
     raise ValueError("INTERCOM_ACCESS_TOKEN not found in environment variables")
 
+@profiled()
 def load_ticket_type_ids():
     """Load ticket type IDs from the previously saved file"""
     try:
@@ -24,8 +27,9 @@ def load_ticket_type_ids():
         print(f"❌ Error loading ticket type IDs: {str(e)}")
         return {}
 
-def create_ticket(ticket_type_name, ticket_type_id, customer_email="test@example.com") -> int :
-    """Create a new ticket"""
+@profiled()
+def create_ticket(ticket_type_name, ticket_type_id, customer_email="test@example.com", title=None, description=None) -> int :
+    """Create a new ticket (defaults to a sample title/description for testing)"""
     url = "https://api.intercom.io/tickets"
     
     headers = {
@@ -43,8 +47,8 @@ def create_ticket(ticket_type_name, ticket_type_id, customer_email="test@example
             }
         ],
         "ticket_attributes": {
-            "_default_title_": f"Test {ticket_type_name}",
-            "_default_description_": f"This is a test ticket for {ticket_type_name}"
+            "_default_title_": title or f"Test {ticket_type_name}",
+            "_default_description_": description or f"This is a test ticket for {ticket_type_name}"
         },
         "ticket_type_id": ticket_type_id
     }
@@ -67,6 +71,25 @@ def create_ticket(ticket_type_name, ticket_type_id, customer_email="test@example
         return None
 
 
+@profiled()
+def create_routed_ticket(title, description, ticket_type_ids, classifier, customer_email="test@example.com"):
+    """Create a ticket with its type picked by the local classifier (falls back to "Other")"""
+    ticket_type_id, ticket_type_name, confidence = route_ticket_type(classifier, title, description, ticket_type_ids)
+
+    if ticket_type_id is None:
+        print(f"❌ No ticket type ID for '{ticket_type_name}', cannot route ticket")
+        return None
+
+    if classifier is None:
+        print(f"🧭 No trained model, routing to '{ticket_type_name}'")
+    elif confidence is None:
+        print(f"🧭 Predicted ticket type has no ID, routing to '{ticket_type_name}'")
+    else:
+        print(f"🧭 Routed to '{ticket_type_name}' ({confidence:.0%} confidence)")
+    return create_ticket(ticket_type_name, ticket_type_id, customer_email, title, description)
+
+
+@profiled()
 def main():
     print("🔍 Loading ticket type IDs...")
     ticket_type_ids = load_ticket_type_ids()
@@ -102,6 +125,17 @@ def main():
         
         print("-" * 40)
     
+    print("📝 Creating auto-routed ticket...")
+    routed_ticket_id = create_routed_ticket(
+        "Delivery arrived on the wrong day",
+        "The order was scheduled for Monday but the delivery date on the PO says Friday",
+        ticket_type_ids,
+        load_classifier()
+    )
+    if routed_ticket_id:
+        created_tickets["Auto-routed"] = routed_ticket_id
+    print("-" * 40)
+
     print("\n" + "=" * 60)
     print("📋 CREATED TICKETS SUMMARY:")
     print("=" * 60)
@@ -0,0 +1,10 @@
+# Ticket types to create (and the categories the classifier predicts)
+ticket_types = [
+    "Quantity Issue",
+    "Address Issue", 
+    "LLM Failure",
+    "Other",
+    "PO Missing",
+    "Logged Wrong",
+    "Wrong Delivery Date",
+]
@@ -2,28 +2,24 @@ import requests
 import os
 import json
 from dotenv import load_dotenv
+from profiling import profiled
+from ticket_type_names import ticket_types
 
 load_dotenv()
 
-# Ticket types to create
-ticket_types = [
-    "Quantity Issue",
-    "Address Issue", 
-    "LLM Failure",
-    "Other",
-    "PO Missing",
-    "Logged Wrong",
-    "Wrong Delivery Date",
-]
-
 # Get access token from environment
 intercom_access_token = os.getenv("INTERCOM_ACCESS_TOKEN")
 
 if not intercom_access_token:
     raise ValueError("INTERCOM_ACCESS_TOKEN not found in environment variables")
 
+@profiled()
 def get_existing_ticket_types():
-    """Get all existing ticket types in the workspace"""
+    """Get all existing ticket types in the workspace (None if they couldn't be listed)
+
+    This decides which types main() creates, so it waits for the real listing
+    instead of going through resilience.hedged_get's deadline and cache.
+    """
     url = "https://api.intercom.io/ticket_types"
     headers = {
         "Intercom-Version": "2.9",
@@ -40,11 +36,12 @@ def get_existing_ticket_types():
             return existing_types
         else:
             print(f"❌ Failed to fetch existing ticket types: {response.status_code} - {response.text}")
-            return {}
+            return None
     except Exception as e:
         print(f"❌ Error fetching existing ticket types: {str(e)}")
-        return {}
+        return None
 
+@profiled()
 def create_ticket_type(ticket_type_name):
     """Create a single ticket type"""
     url = "https://api.intercom.io/ticket_types"
@@ -91,9 +88,14 @@ def create_ticket_type(ticket_type_name):
         print(f"❌ Error creating '{ticket_type_name}': {str(e)}")
         return None
 
+@profiled()
 def main():
     print("🔍 Checking existing ticket types...")
     existing_types = get_existing_ticket_types()
+
+    if existing_types is None:
+        print("❌ Could not list existing ticket types, not creating any (they may already exist).")
+        return None
     
     if existing_types:
         print(f"Found {len(existing_types)} existing ticket types:")